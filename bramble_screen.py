@@ -2,9 +2,20 @@
 """Bramble Partners - Company Screening Tool with Research"""
 
 import argparse
-import sys
+import asyncio
+import io
 import json
+import sys
 import os
+import re
+import tempfile
+import threading
+import time
+import hashlib
+import functools
+import webbrowser
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, as_completed
+from datetime import datetime
 from pathlib import Path
 
 try:
@@ -14,6 +25,14 @@ except ImportError:
     print("  Run: pip3 install anthropic\n")
     sys.exit(1)
 
+try:
+    import pypdfium2 as pdfium
+    import pypdfium2.raw as pdfium_c
+except ImportError:
+    print("\n  ERROR: Missing 'pypdfium2' package")
+    print("  Run: pip3 install pypdfium2\n")
+    sys.exit(1)
+
 try:
     import pdfplumber
 except ImportError:
@@ -28,23 +47,307 @@ except ImportError:
     print("  Run: pip3 install openai\n")
     sys.exit(1)
 
+try:
+    import orjson
+except ImportError:
+    print("\n  ERROR: Missing 'orjson' package")
+    print("  Run: pip3 install orjson\n")
+    sys.exit(1)
+
 import requests
 import base64
+from urllib.parse import quote
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from html_generator import create_memo
 
 
 # Investment thesis loaded from environment variable (set in Streamlit secrets)
 BRAMBLE_THESIS = os.environ.get("BRAMBLE_THESIS", "Investment thesis not configured.")
 
+# Bull and Bear each argue one side from identical context and the IC Chair
+# weighs both, so they run on a cheaper, faster model than the Chair
+BULL_BEAR_MODEL = os.environ.get("BRAMBLE_ADVOCATE_MODEL", "claude-haiku-4-5-20251001")
+
+# extract_company_info only reads the start of the deck
+COMPANY_INFO_CHARS = 8000
+
+# Company name extract_company_info falls back to when it can't read one
+UNKNOWN_COMPANY = "Unknown Company"
+
+# Caps on what goes into every analyst prompt - large decks otherwise multiply
+# input tokens across all three Claude calls
+MAX_DECK_CHARS = 40_000
+MAX_RESEARCH_CHARS = 30_000
+
+# Parses the first complete JSON object in Claude's reply, fenced or not, and
+# ignores whatever prose follows it
+_JSON_DECODER = json.JSONDecoder()
+
+# Share allotment filings (SH01) are the registry's trace of funding rounds
+_ALLOTMENT_RE = re.compile(r"allotment|SH01", re.IGNORECASE)
+
+# Research cache keys ignore legal suffixes and punctuation in company names
+_COMPANY_SUFFIX_RE = re.compile(r"\b(?:ltd|limited|plc|inc|llc|llp|gmbh)\b\.?")
+_NON_ALNUM_RE = re.compile(r"[^a-z0-9]+")
+
+# On-disk research cache (set BRAMBLE_NO_CACHE=1 or pass --no-cache to bypass)
+CACHE_DIR = Path.home() / ".cache" / "bramble"
+CACHE_TTL = 24 * 60 * 60
+# Bump when research prompts or output format change so old entries are ignored
+CACHE_SCHEMA_VERSION = 2
+
+# Research functions report failures as strings - never cache these
+_UNCACHEABLE_PREFIXES = (
+    "Companies House API key not configured",
+    "Companies House search failed",
+    "Companies House lookup failed",
+    "Perplexity API key not configured",
+    "No research available",
+    "Research failed",
+)
+
+
+# One keep-alive session for every Companies House call, so the search loop
+# and detail lookups reuse a single TLS connection
+_CH_SESSION = requests.Session()
+_CH_SESSION.mount("https://", HTTPAdapter(
+    pool_connections=4,
+    pool_maxsize=8,
+    max_retries=Retry(total=3, backoff_factor=0.3, status_forcelist=[429, 500, 502, 503, 504], raise_on_status=False)
+))
+
+
+@functools.lru_cache(maxsize=None)
+def _companies_house_auth(api_key: str) -> str:
+    """Basic auth header value: API key as username, blank password."""
+    return "Basic " + base64.b64encode(f"{api_key}:".encode()).decode()
+
+
+@functools.lru_cache(maxsize=None)
+def _perplexity_client(api_key: str) -> OpenAI:
+    """One Perplexity client per key, so its connection pool stays warm across calls."""
+    return OpenAI(
+        api_key=api_key,
+        base_url="https://api.perplexity.ai"
+    )
+
+
+# Companies House bodies keyed by URL, revalidated with If-None-Match. One file
+# per URL, written atomically, so threads and screen_batch processes can share it
+_ETAG_DIR = CACHE_DIR / "ch_etags"
+# Entries not revalidated for this long are deleted
+_ETAG_MAX_AGE = 30 * 24 * 60 * 60
+
+
+def _etag_file(url: str) -> Path:
+    return _ETAG_DIR / f"{hashlib.sha256(url.encode()).hexdigest()}.etag"
+
+
+@functools.lru_cache(maxsize=None)
+def _prune_etag_store() -> None:
+    """Delete stale ETag entries, once per process."""
+    cutoff = time.time() - _ETAG_MAX_AGE
+    try:
+        with os.scandir(_ETAG_DIR) as entries:
+            for entry in entries:
+                if entry.stat().st_mtime < cutoff:
+                    os.unlink(entry.path)
+    except OSError:
+        pass
+
+
+def _ch_get_json(url: str, api_key: str) -> tuple:
+    """GET a Companies House URL, reusing the stored body when the ETag still matches.
+
+    Auth goes on each request rather than on the shared session, which other
+    threads are using at the same time.
+
+    Returns (status_code, data) - data is None unless the request succeeded.
+    """
+    _prune_etag_store()
+    etag_file = _etag_file(url)
+
+    # Stored as the ETag, a newline, then the body; anything unreadable is a miss
+    cached = None
+    try:
+        etag, _, body = etag_file.read_bytes().partition(b"\n")
+        if etag:
+            cached = (etag.decode(), orjson.loads(body))
+    except Exception:
+        pass
+
+    headers = {"Authorization": _companies_house_auth(api_key)}
+    if cached:
+        headers["If-None-Match"] = cached[0]
+    resp = _CH_SESSION.get(url, headers=headers, timeout=10)
+
+    if resp.status_code == 304 and cached:
+        try:
+            # Still current - keep it clear of pruning
+            os.utime(etag_file)
+        except OSError:
+            pass
+        return 200, cached[1]
+    if resp.status_code != 200:
+        return resp.status_code, None
+
+    data = orjson.loads(resp.content)
+    etag = resp.headers.get("ETag")
+    if etag:
+        try:
+            write_atomic(etag_file, etag.encode() + b"\n" + resp.content)
+        except OSError:
+            pass
+
+    return 200, data
+
+
+def write_atomic(path: Path, data: bytes) -> None:
+    """Write data to path so readers only ever see the old or the new file.
+
+    Each write goes to its own temp file next to path, then os.replace moves
+    it into place, so concurrent writers - Streamlit sessions are threads in
+    one process, screen_batch workers are processes - never share one.
+    """
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with tempfile.NamedTemporaryFile(dir=path.parent, prefix=f".{path.name}.", suffix=".tmp",
+                                     delete=False) as tmp_file:
+        tmp_name = tmp_file.name
+        try:
+            tmp_file.write(data)
+        except BaseException:
+            tmp_file.close()
+            os.unlink(tmp_name)
+            raise
+    try:
+        os.replace(tmp_name, path)
+    except BaseException:
+        os.unlink(tmp_name)
+        raise
+
+
+def cached_file(path: Path, compute, dump=str.encode, load=bytes.decode, keep=None):
+    """Return the value stored at path, or compute it and store it atomically.
+
+    For results keyed by content, e.g. a deck's SHA-256, so they never go
+    stale. keep(value) can veto storing a result.
+    """
+    try:
+        return load(path.read_bytes())
+    except (OSError, ValueError):
+        pass
+
+    value = compute()
+    if keep is None or keep(value):
+        try:
+            write_atomic(path, dump(value))
+        except OSError:
+            pass
+    return value
+
+
+def disk_cache(ttl: int = CACHE_TTL, key=None):
+    """Cache a research function's result on disk, keyed by its arguments.
+
+    key(*args, **kwargs) can replace the arguments with a normalised cache key,
+    or return None to skip the cache for that call.
+    """
+
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if os.environ.get("BRAMBLE_NO_CACHE"):
+                return func(*args, **kwargs)
+
+            key_parts = (args, kwargs) if key is None else (key(*args, **kwargs),)
+            if key_parts[0] is None:
+                return func(*args, **kwargs)
+
+            key_bytes = orjson.dumps([CACHE_SCHEMA_VERSION, func.__name__, *key_parts],
+                                     option=orjson.OPT_SORT_KEYS, default=str)
+            cache_file = CACHE_DIR / f"{hashlib.sha256(key_bytes).hexdigest()}.json"
+
+            try:
+                entry = orjson.loads(cache_file.read_bytes())
+                if time.time() - entry["created"] < ttl:
+                    return entry["result"]
+            except (OSError, ValueError, KeyError):
+                pass
+
+            result = func(*args, **kwargs)
 
-def extract_pdf_text(pdf_path: str) -> str:
-    """Extract text content from a PDF file."""
-    text_parts = []
-    with pdfplumber.open(pdf_path) as pdf:
+            if isinstance(result, str) and not result.startswith(_UNCACHEABLE_PREFIXES):
+                try:
+                    write_atomic(cache_file, orjson.dumps({"created": time.time(), "result": result}))
+                except OSError:
+                    pass
+
+            return result
+        return wrapper
+    return decorator
+
+
+# Serialises every call into PDFium within this process
+_PDFIUM_LOCK = threading.Lock()
+
+
+def iter_pdf_pages(pdf_source: str | bytes):
+    """Yield the text of each non-empty PDF page, in order.
+
+    pdf_source is a file path or the PDF's bytes, e.g. an in-memory upload.
+
+    PDFium does plain text extraction without pdfplumber's layout analysis;
+    pdfplumber is kept as a fallback for decks PDFium returns no text for.
+    Image-only (scanned) decks have no text objects at all, so they skip the
+    fallback pass and come back empty straight away.
+    """
+    pages = []
+    has_text_objects = False
+    # PDFium is not thread-safe, even across documents, and Streamlit runs each
+    # session on its own thread: hold the lock from open to close, yield after
+    with _PDFIUM_LOCK:
+        pdf = pdfium.PdfDocument(pdf_source)
+        try:
+            for i, page in enumerate(pdf, 1):
+                # Release each page's native buffers as soon as its text is out
+                textpage = page.get_textpage()
+                page_text = textpage.get_text_range().replace("\r\n", "\n")
+                textpage.close()
+                if page_text.strip():
+                    pages.append(f"[Page {i}]\n{page_text}")
+                elif not has_text_objects:
+                    text_objects = page.get_objects(filter=[pdfium_c.FPDF_PAGEOBJ_TEXT])
+                    has_text_objects = next(text_objects, None) is not None
+                page.close()
+        finally:
+            pdf.close()
+
+    yield from pages
+    found_text = bool(pages)
+
+    if found_text or not has_text_objects:
+        return
+
+    if isinstance(pdf_source, bytes):
+        pdf_source = io.BytesIO(pdf_source)
+    with pdfplumber.open(pdf_source) as pdf:
         for i, page in enumerate(pdf.pages, 1):
             page_text = page.extract_text()
+            page.flush_cache()
             if page_text:
-                text_parts.append(f"[Page {i}]\n{page_text}")
-    return "\n\n".join(text_parts)
+                yield f"[Page {i}]\n{page_text}"
+
+
+def extract_pdf_text(pdf_source: str | bytes) -> str:
+    """Extract text content from a PDF file path or PDF bytes."""
+    buf = io.StringIO()
+    for i, page_text in enumerate(iter_pdf_pages(pdf_source)):
+        if i:
+            buf.write("\n\n")
+        buf.write(page_text)
+    return buf.getvalue()
 
 
 def extract_company_info(client: anthropic.Anthropic, deck_content: str) -> dict:
@@ -58,7 +361,7 @@ def extract_company_info(client: anthropic.Anthropic, deck_content: str) -> dict
             "content": f"""Extract the following from this pitch deck. Return JSON only, no other text.
 
 PITCH DECK:
-{deck_content[:8000]}
+{deck_content[:COMPANY_INFO_CHARS]}
 
 Return this exact JSON format:
 {{"company_name": "Name of the company", "industry": "Their industry/sector", "founders": ["Founder 1 name", "Founder 2 name"], "product": "What they sell/do in 5 words"}}"""
@@ -66,18 +369,23 @@ Return this exact JSON format:
     )
 
     try:
-        # Extract JSON from response
         text = response.content[0].text
-        # Handle if Claude wraps it in markdown code blocks
-        if "```" in text:
-            text = text.split("```")[1]
-            if text.startswith("json"):
-                text = text[4:]
-        return json.loads(text.strip())
-    except:
-        return {"company_name": "Unknown Company", "industry": "food tech", "founders": [], "product": "unknown"}
+    except (IndexError, AttributeError):
+        # Empty reply, or a first block that isn't text
+        text = ""
+
+    start = text.find("{")
+    if start != -1:
+        try:
+            info, _ = _JSON_DECODER.raw_decode(text, start)
+            if isinstance(info, dict):
+                return info
+        except ValueError:
+            pass
+    return {"company_name": UNKNOWN_COMPANY, "industry": "food tech", "founders": [], "product": "unknown"}
 
 
+@disk_cache()
 def research_companies_house(company_name: str) -> str:
     """Fetch company data from Companies House API."""
 
@@ -91,43 +399,37 @@ def research_companies_house(company_name: str) -> str:
     if not api_key:
         return "Companies House API key not configured - skipping UK registry lookup."
 
-    # Basic auth with API key as username, blank password
-    auth = base64.b64encode(f"{api_key}:".encode()).decode()
-    headers = {"Authorization": f"Basic {auth}"}
-
     results = []
 
     try:
-        # Search for company - try with common suffixes for better matching
+        # Search for company - bare name first (most likely exact match), then common suffixes
         search_queries = [
-            f"{company_name} Technologies Limited",
-            f"{company_name} Technologies Ltd",
-            f"{company_name} Technologies",
-            f"{company_name} Limited",
+            company_name,
             f"{company_name} Ltd",
-            company_name
+            f"{company_name} Limited",
+            f"{company_name} Technologies Ltd",
+            f"{company_name} Technologies Limited",
+            f"{company_name} Technologies"
         ]
+        name_lower = company_name.lower()
 
         search_data = None
+        fallback = None
         for query in search_queries:
-            search_url = f"https://api.company-information.service.gov.uk/search/companies?q={requests.utils.quote(query)}"
-            resp = requests.get(search_url, headers=headers, timeout=10)
-            if resp.status_code == 200:
-                data = resp.json()
-                # Check if first result is a good match (contains the company name)
-                if data.get("items") and company_name.lower() in data["items"][0].get("title", "").lower():
-                    search_data = data
-                    break
+            search_url = f"https://api.company-information.service.gov.uk/search/companies?q={quote(query)}"
+            status, data = _ch_get_json(search_url, api_key)
+            if fallback is None:
+                fallback = (status, data)
+            # Stop as soon as the first result starts with the company name
+            if data and data.get("items") and data["items"][0].get("title", "").lower().startswith(name_lower):
+                search_data = data
+                break
 
         if not search_data:
-            # Fallback to original search
-            search_url = f"https://api.company-information.service.gov.uk/search/companies?q={requests.utils.quote(company_name)}"
-            resp = requests.get(search_url, headers=headers, timeout=10)
-
-            if resp.status_code != 200:
-                return f"Companies House search failed (status {resp.status_code})"
-
-            search_data = resp.json()
+            # Fall back to the bare-name search
+            status, search_data = fallback
+            if status != 200:
+                return f"Companies House search failed (status {status})"
 
         if not search_data.get("items"):
             return f"No Companies House record found for '{company_name}'"
@@ -144,52 +446,48 @@ def research_companies_house(company_name: str) -> str:
         results.append(f"Address: {company.get('address_snippet', 'Unknown')}")
         results.append("")
 
-        # Get officers (directors)
-        officers_url = f"https://api.company-information.service.gov.uk/company/{company_number}/officers"
-        officers_resp = requests.get(officers_url, headers=headers, timeout=10)
-
-        if officers_resp.status_code == 200:
-            officers_data = officers_resp.json()
+        # Officers, PSC and filings are independent - fetch them concurrently
+        base_url = f"https://api.company-information.service.gov.uk/company/{company_number}"
+        detail_urls = {
+            "officers": f"{base_url}/officers",
+            "psc": f"{base_url}/persons-with-significant-control",
+            "filings": f"{base_url}/filing-history?items_per_page=50",
+        }
+        with ThreadPoolExecutor(max_workers=3) as ex:
+            futures = {name: ex.submit(_ch_get_json, url, api_key) for name, url in detail_urls.items()}
+            _, officers_data = futures["officers"].result()
+            _, psc_data = futures["psc"].result()
+            _, filings_data = futures["filings"].result()
+
+        # Officers (directors)
+        if officers_data is not None:
             results.append("### DIRECTORS & OFFICERS:")
-            for officer in officers_data.get("items", [])[:10]:
-                name = officer.get("name", "Unknown")
-                role = officer.get("officer_role", "")
-                appointed = officer.get("appointed_on", "")
-                resigned = officer.get("resigned_on", "")
-                status = f"(resigned {resigned})" if resigned else "(current)"
-                results.append(f"- {name} - {role} - appointed {appointed} {status}")
+            results.extend([
+                f"- {o.get('name', 'Unknown')} - {o.get('officer_role', '')} - appointed {o.get('appointed_on', '')} "
+                + (f"(resigned {o['resigned_on']})" if o.get("resigned_on") else "(current)")
+                for o in officers_data.get("items", [])[:10]
+            ])
             results.append("")
 
-        # Get persons with significant control (major shareholders)
-        psc_url = f"https://api.company-information.service.gov.uk/company/{company_number}/persons-with-significant-control"
-        psc_resp = requests.get(psc_url, headers=headers, timeout=10)
-
-        if psc_resp.status_code == 200:
-            psc_data = psc_resp.json()
+        # Persons with significant control (major shareholders)
+        if psc_data is not None:
             results.append("### PERSONS WITH SIGNIFICANT CONTROL (>25% ownership):")
-            for psc in psc_data.get("items", [])[:10]:
-                name = psc.get("name", psc.get("name_elements", {}).get("surname", "Unknown"))
-                nature = ", ".join(psc.get("natures_of_control", []))
-                notified = psc.get("notified_on", "")
-                results.append(f"- {name}: {nature} (notified {notified})")
+            results.extend([
+                f"- {p.get('name', p.get('name_elements', {}).get('surname', 'Unknown'))}: "
+                f"{', '.join(p.get('natures_of_control', []))} (notified {p.get('notified_on', '')})"
+                for p in psc_data.get("items", [])[:10]
+            ])
             results.append("")
 
-        # Get filing history (look for share allotments = funding rounds)
-        filings_url = f"https://api.company-information.service.gov.uk/company/{company_number}/filing-history?items_per_page=50"
-        filings_resp = requests.get(filings_url, headers=headers, timeout=10)
-
-        if filings_resp.status_code == 200:
-            filings_data = filings_resp.json()
+        # Filing history (look for share allotments = funding rounds)
+        if filings_data is not None:
             results.append("### RECENT SHARE ALLOTMENTS (potential funding rounds):")
             allotments = [f for f in filings_data.get("items", [])
-                         if "allotment" in f.get("description", "").lower() or
-                            "SH01" in f.get("type", "")]
+                          if _ALLOTMENT_RE.search(f.get("description", "")) or
+                             _ALLOTMENT_RE.search(f.get("type", ""))]
 
             if allotments:
-                for filing in allotments[:10]:
-                    date = filing.get("date", "")
-                    desc = filing.get("description", "")
-                    results.append(f"- {date}: {desc}")
+                results.extend([f"- {f.get('date', '')}: {f.get('description', '')}" for f in allotments[:10]])
             else:
                 results.append("- No share allotments found in recent filings")
             results.append("")
@@ -202,59 +500,26 @@ def research_companies_house(company_name: str) -> str:
         return f"Companies House lookup failed: {e}"
 
 
-def research_investors(company_name: str, industry: str) -> str:
-    """Dedicated Perplexity query for investor/funding information."""
-
-    api_key = os.environ.get("PERPLEXITY_API_KEY")
-    if not api_key:
-        key_file = Path(__file__).parent / ".perplexity_key"
-        if key_file.exists():
-            api_key = key_file.read_text().strip()
-
-    if not api_key:
-        return "Perplexity API key not configured - skipping investor research."
-
-    client = OpenAI(api_key=api_key, base_url="https://api.perplexity.ai")
-
-    investor_prompt = f"""List ALL funding rounds and investors for "{company_name}" (UK {industry} company).
-
-For EACH funding round, provide:
-- Round name (Seed, Series A, Series B, etc.)
-- Date (month and year)
-- Amount raised
-- Lead investor(s)
-- All participating investors
-- Valuation (if known)
-
-Also list:
-- Any angel investors by name
-- Government grants (Innovate UK, UKRI, etc.)
-- Total funding raised to date
-
-Be specific - name every investor mentioned in any source. Cite the source URL for each fact."""
-
-    try:
-        response = client.chat.completions.create(
-            model="sonar-pro",
-            messages=[{"role": "user", "content": investor_prompt}]
-        )
-        content = response.choices[0].message.content
-
-        # Extract citations
-        try:
-            raw = response.model_dump()
-            if 'citations' in raw and raw['citations']:
-                content += "\n\nSOURCES:\n"
-                for i, url in enumerate(raw['citations'], 1):
-                    content += f"[{i}] {url}\n"
-        except:
-            pass
+def _company_cache_key(company_info: dict):
+    """Cache key for company research: the company name and industry with case,
+    punctuation and legal suffixes normalised away, so the same company described
+    slightly differently by the deck extraction reuses one research run, while
+    unrelated companies sharing a common name don't.
+    """
+    name = company_info.get("company_name")
+    if not isinstance(name, str):
+        return None
+    name = _COMPANY_SUFFIX_RE.sub(" ", name.lower())
+    name = "".join(_NON_ALNUM_RE.sub(" ", name).split())
+    if not name or name in ("unknown", "unknowncompany"):
+        return None
 
-        return content
-    except Exception as e:
-        return f"Investor research failed: {e}"
+    industry = company_info.get("industry")
+    industry = "".join(_NON_ALNUM_RE.sub(" ", industry.lower()).split()) if isinstance(industry, str) else ""
+    return [name, industry]
 
 
+@disk_cache(key=_company_cache_key)
 def research_with_perplexity(company_info: dict) -> str:
     """Conduct deep research using Perplexity API."""
 
@@ -279,10 +544,7 @@ def research_with_perplexity(company_info: dict) -> str:
 
     founder_str = ", ".join(founders[:3]) if founders else "the founders"
 
-    client = OpenAI(
-        api_key=api_key,
-        base_url="https://api.perplexity.ai"
-    )
+    client = _perplexity_client(api_key)
 
     research_prompt = f"""Research the company "{company}" in the {industry} sector for a venture capital investment screening.
 
@@ -315,6 +577,15 @@ Provide comprehensive, factual information on:
 
 8. **Recent News**: Latest developments in the past 6-12 months.
 
+9. **DETAILED FUNDING ROUNDS** - List ALL funding rounds and investors. For EACH round provide:
+   - Round name (Seed, Series A, Series B, etc.)
+   - Date (month and year)
+   - Amount raised
+   - Lead investor(s)
+   - All participating investors
+   - Valuation (if known)
+   Also list every angel investor by name, all government grants (Innovate UK, UKRI, etc.), and total funding raised to date. Name every investor mentioned in any source.
+
 Be specific with numbers, dates, and sources where possible. If information is not available, say so explicitly rather than guessing.
 
 IMPORTANT: For each fact you provide, cite the specific source URL where you found it. Use inline citations like [1], [2] etc. and list all URLs at the end. Only cite URLs that actually contain the specific information - don't cite a company homepage for market data."""
@@ -366,14 +637,78 @@ IMPORTANT: For each fact you provide, cite the specific source URL where you fou
         return f"Research failed: {e}"
 
 
-def analyze_company(deck_content: str, research_text: str, additional_notes: str = "") -> str:
-    """Multi-agent debate: Bull analyst, Bear analyst, then IC Chair synthesizes."""
+class ScreeningError(Exception):
+    """A deck could not be screened (missing file, unreadable PDF, no text)."""
 
-    client = anthropic.Anthropic()
+
+def _truncate(text: str, max_chars: int) -> str:
+    """Cut text to max_chars, noting how much was dropped."""
+    if len(text) <= max_chars:
+        return text
+    return text[:max_chars] + f"\n\n[...truncated {len(text) - max_chars} chars...]"
+
+
+def _with_shared_context(shared_context: str, prompt: str, notes: str = "",
+                         cache: bool = True) -> list:
+    """Build a user message with the shared thesis/deck/research prefix first.
+
+    With cache=True the prefix is marked for prompt caching: the Bull and Bear
+    analysts share a model, so Bear reads what Bull wrote. The meeting notes
+    and role-specific instructions follow uncached, so re-screening a deck with
+    new notes within the cache window still reuses the prefix. The cache is
+    per model, so the IC Chair (a different model, called once) passes
+    cache=False rather than paying for a write nothing would read.
+    """
+    prefix = {"type": "text", "text": shared_context}
+    if cache:
+        prefix["cache_control"] = {"type": "ephemeral"}
+    content = [prefix]
+    if notes:
+        content.append({"type": "text", "text": notes})
+    content.append({"type": "text", "text": prompt})
+    return [{"role": "user", "content": content}]
+
+
+def _stream_message(client: anthropic.Anthropic, started: threading.Event, **kwargs):
+    """Send a Messages request as a stream and return the final message.
+
+    started is set once the response begins - from then on the prompt prefix
+    it cached can be read by other requests - or when the request fails.
+    """
+    try:
+        with client.messages.stream(**kwargs) as stream:
+            for _ in stream:
+                started.set()
+            return stream.get_final_message()
+    finally:
+        started.set()
+
+
+def _log_cache_usage(label: str, response) -> None:
+    """Print how many input tokens were served from the prompt cache."""
+    usage = getattr(response, "usage", None)
+    cached = getattr(usage, "cache_read_input_tokens", None) or 0
+    written = getattr(usage, "cache_creation_input_tokens", None) or 0
+    print(f"          {label}: {cached} cached / {written} cache-write input tokens")
+
+
+def analyze_company(deck_content: str, research_text: str, additional_notes: str = "",
+                    on_text=None, max_deck_chars: int = MAX_DECK_CHARS,
+                    client: anthropic.Anthropic = None) -> str:
+    """Multi-agent debate: Bull analyst, Bear analyst, then IC Chair synthesizes.
+
+    The IC Chair response is streamed; pass on_text to receive each chunk of
+    text as it arrives. Pass client to reuse an existing (warm) API client.
+    """
+
+    client = client or anthropic.Anthropic()
+
+    deck_content = _truncate(deck_content, max_deck_chars)
+    research_text = _truncate(research_text, MAX_RESEARCH_CHARS)
 
     notes_section = ""
     if additional_notes:
-        notes_section = f"\n\nADDITIONAL NOTES FROM MEETING:\n{additional_notes}"
+        notes_section = f"ADDITIONAL NOTES FROM MEETING:\n{additional_notes}"
 
     # Shared context for all analysts
     shared_context = f"""{BRAMBLE_THESIS}
@@ -383,7 +718,6 @@ def analyze_company(deck_content: str, research_text: str, additional_notes: str
 
 ===== SOURCE 2: EXTERNAL RESEARCH (cite with URLs) =====
 {research_text}
-{notes_section}
 
 CITATION RULES:
 - Deck content → cite as "(per deck)"
@@ -396,8 +730,6 @@ CITATION RULES:
 
 You are an advocate, not a judge. Find every reason to say yes. Be persuasive but grounded in facts.
 
-{shared_context}
-
 Write a compelling investment case covering:
 
 1. **THE OPPORTUNITY** - Why this company matters for the food system. What's the big insight?
@@ -417,14 +749,6 @@ Write a compelling investment case covering:
 Write in British English. Be assertive and confident. Bold **key points**.
 Your goal: Make the IC want to pursue this deal."""
 
-    print("    [1/3] Bull analyst building investment case...")
-    bull_response = client.messages.create(
-        model="claude-sonnet-4-20250514",
-        max_tokens=3000,
-        messages=[{"role": "user", "content": bull_prompt}]
-    )
-    bull_case = bull_response.content[0].text
-
     # ========== BEAR ANALYST ==========
     bear_prompt = f"""You are a BEAR ANALYST at Bramble Partners. Your job is to make the STRONGEST POSSIBLE CASE for PASSING on this company.
 
@@ -432,8 +756,6 @@ You are a skeptic and devil's advocate. Find every reason to say no. Poke holes.
 
 Your reputation depends on protecting the fund from bad deals. Most deals should be passed on.
 
-{shared_context}
-
 Write a rigorous critique covering:
 
 1. **RED FLAGS** - What's concerning about this company? What claims are unverified or suspicious?
@@ -453,18 +775,39 @@ Write a rigorous critique covering:
 Write in British English. Be assertive and direct. Bold **key concerns**.
 Your goal: Make the IC think twice before pursuing this deal."""
 
-    print("    [2/3] Bear analyst stress-testing the opportunity...")
-    bear_response = client.messages.create(
-        model="claude-sonnet-4-20250514",
-        max_tokens=3000,
-        messages=[{"role": "user", "content": bear_prompt}]
-    )
+    # Bull and Bear don't see each other's work, so they argue side by side.
+    # Bear starts once Bull's response has begun: a cache entry is only readable
+    # from then on, so Bear reads the shared prefix rather than writing it again
+    print("    [1/3] Bull analyst building investment case...")
+    bull_started = threading.Event()
+    with ThreadPoolExecutor(max_workers=2) as ex:
+        bull_future = ex.submit(
+            _stream_message,
+            client,
+            bull_started,
+            model=BULL_BEAR_MODEL,
+            max_tokens=2000,
+            messages=_with_shared_context(shared_context, bull_prompt, notes_section)
+        )
+        bull_started.wait()
+        print("    [2/3] Bear analyst stress-testing the opportunity...")
+        bear_future = ex.submit(
+            client.messages.create,
+            model=BULL_BEAR_MODEL,
+            max_tokens=2000,
+            messages=_with_shared_context(shared_context, bear_prompt, notes_section)
+        )
+        bull_response = bull_future.result()
+        bear_response = bear_future.result()
+    _log_cache_usage("Bull", bull_response)
+    _log_cache_usage("Bear", bear_response)
+    bull_case = bull_response.content[0].text
     bear_case = bear_response.content[0].text
 
     # ========== IC CHAIR (SYNTHESIS) ==========
     synthesis_prompt = f"""You are the IC CHAIR at Bramble Partners, writing the final investment screening memo.
 
-You have received arguments from two analysts:
+You have received arguments from two analysts, both working from the sources above:
 - The BULL ANALYST argued for investing
 - The BEAR ANALYST argued for passing
 
@@ -476,9 +819,6 @@ Your job: Weigh both sides fairly, identify the key debates, and make a clear re
 ===== BEAR ANALYST'S CASE =====
 {bear_case}
 
-===== ORIGINAL SOURCES =====
-{shared_context}
-
 ===== YOUR TASK =====
 
 FIRST, write a DELIBERATION section where you think through the decision:
@@ -667,13 +1007,19 @@ One final confident paragraph. Acknowledge the tension between bull and bear, th
 """
 
     print("    [3/3] IC Chair synthesising and making recommendation...")
-    synthesis_response = client.messages.create(
+    chunks = []
+    with client.messages.stream(
         model="claude-sonnet-4-20250514",
         max_tokens=7000,
-        messages=[{"role": "user", "content": synthesis_prompt}]
-    )
+        messages=_with_shared_context(shared_context, synthesis_prompt, notes_section, cache=False)
+    ) as stream:
+        for text in stream.text_stream:
+            chunks.append(text)
+            if on_text:
+                on_text(text)
+        synthesis_response = stream.get_final_message()
 
-    full_response = synthesis_response.content[0].text
+    full_response = "".join(chunks)
 
     # Parse out deliberation and memo sections
     deliberation = ""
@@ -696,97 +1042,109 @@ One final confident paragraph. Acknowledge the tension between bull and bear, th
     }
 
 
-def main():
-    parser = argparse.ArgumentParser(description="Bramble Company Screener")
-    parser.add_argument("pdf", help="Path to the company pitch deck (PDF)")
-    parser.add_argument("--notes", "-n", default="", help="Additional notes from meeting")
-    parser.add_argument("--output", "-o", help="Save output to file")
-    parser.add_argument("--no-research", action="store_true", help="Skip web research")
+async def _read_and_research(client: anthropic.Anthropic, pdf_path: Path, research: bool) -> tuple:
+    """Read the deck and run the research as a small DAG of blocking calls.
+
+    Company-info extraction starts once the first COMPANY_INFO_CHARS of text
+    are in, while the rest of the PDF is still being parsed; the registry and
+    web lookups start as soon as the company name is known. Returns
+    (deck_content, research_text).
+    """
+    loop = asyncio.get_running_loop()
+    deck_head = loop.create_future()
+
+    def read_pdf():
+        pages = []
+        extracted_chars = 0
+        head_sent = False
+        for page_text in iter_pdf_pages(str(pdf_path)):
+            pages.append(page_text)
+            extracted_chars += len(page_text)
+            if not head_sent and extracted_chars >= COMPANY_INFO_CHARS:
+                head_sent = True
+                loop.call_soon_threadsafe(deck_head.set_result, "\n\n".join(pages))
+        deck_content = "\n\n".join(pages)
+        if not head_sent:
+            loop.call_soon_threadsafe(deck_head.set_result, deck_content)
+        return deck_content
+
+    async def full_deck():
+        try:
+            return await pdf_task
+        except Exception as e:
+            raise ScreeningError(f"Could not read PDF {pdf_path.name}: {e}") from e
+
+    pdf_task = loop.run_in_executor(None, read_pdf)
+    await asyncio.wait([deck_head, pdf_task], return_when=asyncio.FIRST_COMPLETED)
+    if not deck_head.done():
+        # read_pdf failed before it had enough text to share
+        await full_deck()
+
+    # The head is the whole deck when it's shorter than COMPANY_INFO_CHARS
+    if not deck_head.result().strip():
+        raise ScreeningError(
+            f"Could not extract text from {pdf_path.name}. "
+            "The PDF might be image-based (scanned) - try a PDF with selectable text."
+        )
 
-    args = parser.parse_args()
+    if not research:
+        print("\n  Skipping research (--no-research flag).\n")
+        return await full_deck(), ""
 
-    pdf_path = Path(args.pdf)
-    if not pdf_path.exists():
-        print(f"\n  ERROR: File not found: {args.pdf}\n")
-        sys.exit(1)
+    print("\n  Extracting company info from deck...")
+    company_info = await loop.run_in_executor(None, extract_company_info, client, deck_head.result())
+    company_name = company_info.get('company_name', 'Unknown')
+    print(f"  Found: {company_name}")
 
-    if pdf_path.suffix.lower() != ".pdf":
-        print(f"\n  ERROR: File must be a PDF: {args.pdf}\n")
-        sys.exit(1)
+    # The lookups share no data, so run them side by side
+    print("\n  Researching in parallel (Companies House, Perplexity)...")
+    ch_task = loop.run_in_executor(None, research_companies_house, company_name)
+    perplexity_task = loop.run_in_executor(None, research_with_perplexity, company_info)
+    ch_task.add_done_callback(lambda f: print("  Companies House lookup complete."))
+    perplexity_task.add_done_callback(lambda f: print("  Company & funding research complete."))
 
-    # Extract text
-    try:
-        deck_content = extract_pdf_text(str(pdf_path))
-    except Exception as e:
-        print(f"\n  ERROR reading PDF: {e}\n")
-        sys.exit(1)
+    deck_content, ch_research, perplexity_research = await asyncio.gather(full_deck(), ch_task, perplexity_task)
+    print()
 
-    if not deck_content.strip():
-        print("\n  ERROR: Could not extract text from this PDF.")
-        print("  The PDF might be image-based (scanned).")
-        print("  Try a PDF with selectable text.\n")
-        sys.exit(1)
+    # Combine research
+    research_text = f"""=== COMPANIES HOUSE (UK OFFICIAL REGISTRY) ===
+{ch_research}
 
-    # Initialize client
-    try:
-        client = anthropic.Anthropic()
-    except anthropic.AuthenticationError:
-        print("\n  ERROR: Invalid API key.")
-        print("  Delete the .api_key file and run again to enter a new key.\n")
-        sys.exit(1)
+=== COMPANY, INVESTOR & FUNDING RESEARCH ===
+{perplexity_research}"""
 
-    # Research phase
-    research_text = ""
-    if not args.no_research:
-        print("\n  Extracting company info from deck...")
-        company_info = extract_company_info(client, deck_content)
-        company_name = company_info.get('company_name', 'Unknown')
-        print(f"  Found: {company_name}")
+    return deck_content, research_text
 
-        print("\n  Checking Companies House (UK registry)...")
-        ch_research = research_companies_house(company_name)
-        print("  Companies House lookup complete.")
 
-        print("\n  Researching investors & funding...")
-        investor_research = research_investors(company_name, company_info.get('industry', 'technology'))
-        print("  Investor research complete.")
+def screen_one(pdf_path: Path, notes: str = "", output_dir: Path = None, output_path: Path = None,
+               research: bool = True, max_deck_chars: int = MAX_DECK_CHARS, interactive: bool = True) -> Path:
+    """Screen a single pitch deck and write its memo, returning the memo path.
 
-        print("\n  Conducting general research via Perplexity...")
-        perplexity_research = research_with_perplexity(company_info)
-        print("  General research complete.\n")
+    The memo goes to output_path if given, otherwise into output_dir (default:
+    next to the deck). interactive echoes the IC Chair as it writes and opens
+    the memo in a browser.
+    """
+    pdf_path = Path(pdf_path)
+    if not pdf_path.exists():
+        raise ScreeningError(f"File not found: {pdf_path}")
 
-        # Combine research
-        research_text = f"""=== COMPANIES HOUSE (UK OFFICIAL REGISTRY) ===
-{ch_research}
+    if pdf_path.suffix.lower() != ".pdf":
+        raise ScreeningError(f"File must be a PDF: {pdf_path}")
 
-=== INVESTOR & FUNDING RESEARCH ===
-{investor_research}
+    # Each call (and each batch worker process) builds its own client
+    client = anthropic.Anthropic()
 
-=== GENERAL COMPANY RESEARCH ===
-{perplexity_research}"""
-    else:
-        print("\n  Skipping research (--no-research flag).\n")
+    deck_content, research_text = asyncio.run(_read_and_research(client, pdf_path, research))
 
     # Analyze
     print("  Running investment committee debate...")
-    try:
-        analysis = analyze_company(deck_content, research_text, args.notes)
-    except anthropic.AuthenticationError:
-        print("\n  ERROR: Invalid API key.")
-        print("  Delete the .api_key file and run again to enter a new key.\n")
-        sys.exit(1)
-    except anthropic.APIError as e:
-        print(f"\n  ERROR from Claude API: {e}\n")
-        sys.exit(1)
+    on_text = (lambda text: print(text, end="", flush=True)) if interactive else None
+    analysis = analyze_company(deck_content, research_text, notes, on_text=on_text,
+                               max_deck_chars=max_deck_chars, client=client)
 
     # Output to console (minimal)
     print("\n  Analysis complete.")
 
-    # Generate HTML
-    from datetime import datetime
-    from html_generator import create_memo
-    import webbrowser
-
     # Extract components from analysis dict
     memo_text = analysis['memo']
     bull_case = analysis['bull_case']
@@ -807,12 +1165,12 @@ def main():
     date_display = datetime.now().strftime("%d %B %Y")
     safe_company_name = company_name.replace(" ", "_").replace("/", "-")
 
-    if args.output:
-        output_path = Path(args.output)
+    if output_path:
+        output_path = Path(output_path)
         if not output_path.suffix:
             output_path = output_path.with_suffix('.html')
     else:
-        output_path = pdf_path.parent / f"MEMO_{safe_company_name}_{date_str}.html"
+        output_path = Path(output_dir or pdf_path.parent) / f"MEMO_{safe_company_name}_{date_str}.html"
 
     print("  Generating memo...")
 
@@ -831,9 +1189,12 @@ def main():
         print(f"  MEMO SAVED: {output_path.name}")
         print(f"  ============================================")
 
-        # Open in browser
-        webbrowser.open(f'file://{output_path.absolute()}')
-        print(f"\n  Opened in browser. Print to PDF if needed.")
+        if interactive:
+            # Open in browser
+            webbrowser.open(f'file://{output_path.absolute()}')
+            print(f"\n  Opened in browser. Print to PDF if needed.")
+
+        return output_path
 
     except Exception as e:
         print(f"\n  Warning: Could not generate HTML: {e}")
@@ -848,6 +1209,90 @@ def main():
             f.write(f"**Source:** {pdf_path.name}\n\n---\n\n")
             f.write(memo_text)
         print(f"  Saved to: {md_path.name}")
+        return md_path
+
+
+def _screen_one_in_worker(*args, **kwargs) -> Path:
+    """screen_one for a worker process, raising only picklable errors.
+
+    API errors such as anthropic.RateLimitError take keyword-only constructor
+    arguments, so the parent can't unpickle them and the whole pool breaks;
+    they come back as a plain ScreeningError instead.
+    """
+    try:
+        return screen_one(*args, **kwargs)
+    except ScreeningError:
+        raise
+    except Exception as e:
+        raise ScreeningError(f"{type(e).__name__}: {e}") from None
+
+
+def screen_batch(pdfs: list, notes: str = "", output_dir: Path = None, **kwargs) -> list:
+    """Screen several decks at once, one worker process per deck.
+
+    A deck that fails is reported and skipped; returns the memo paths written.
+    """
+    memos = []
+    with ProcessPoolExecutor(max_workers=min(len(pdfs), os.cpu_count() or 1)) as ex:
+        futures = {ex.submit(_screen_one_in_worker, pdf, notes, output_dir, interactive=False, **kwargs): pdf
+                   for pdf in pdfs}
+        for future in as_completed(futures):
+            try:
+                memos.append(future.result())
+            except Exception as e:
+                print(f"\n  ERROR screening {Path(futures[future]).name}: {e}\n")
+    return memos
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Bramble Company Screener")
+    parser.add_argument("pdf", nargs="?", help="Path to the company pitch deck (PDF)")
+    parser.add_argument("--batch-dir", help="Screen every PDF in this folder in parallel")
+    parser.add_argument("--notes", "-n", default="", help="Additional notes from meeting")
+    parser.add_argument("--output", "-o", help="Save output to file (with --batch-dir: folder to save the memos in)")
+    parser.add_argument("--no-research", action="store_true", help="Skip web research")
+    parser.add_argument("--no-cache", action="store_true", help="Bypass the on-disk research cache")
+    parser.add_argument("--max-deck-chars", type=int, default=MAX_DECK_CHARS,
+                        help=f"Truncate deck text sent to the analysts (default {MAX_DECK_CHARS})")
+
+    args = parser.parse_args()
+
+    if not args.pdf and not args.batch_dir:
+        parser.error("give a PDF or --batch-dir")
+
+    if args.no_cache:
+        os.environ["BRAMBLE_NO_CACHE"] = "1"
+
+    if args.batch_dir:
+        pdfs = sorted(Path(args.batch_dir).glob("*.pdf"))
+        if not pdfs:
+            print(f"\n  ERROR: No PDFs found in {args.batch_dir}\n")
+            sys.exit(1)
+        output_dir = None
+        if args.output:
+            output_dir = Path(args.output)
+            if output_dir.exists() and not output_dir.is_dir():
+                parser.error("with --batch-dir, --output must be a folder")
+            output_dir.mkdir(parents=True, exist_ok=True)
+        print(f"\n  Screening {len(pdfs)} decks...")
+        memos = screen_batch(pdfs, args.notes, output_dir, research=not args.no_research,
+                             max_deck_chars=args.max_deck_chars)
+        print(f"\n  {len(memos)} of {len(pdfs)} memos saved.\n")
+        sys.exit(0 if len(memos) == len(pdfs) else 1)
+
+    try:
+        screen_one(Path(args.pdf), args.notes, output_path=args.output,
+                   research=not args.no_research, max_deck_chars=args.max_deck_chars)
+    except ScreeningError as e:
+        print(f"\n  ERROR: {e}\n")
+        sys.exit(1)
+    except anthropic.AuthenticationError:
+        print("\n  ERROR: Invalid API key.")
+        print("  Delete the .api_key file and run again to enter a new key.\n")
+        sys.exit(1)
+    except anthropic.APIError as e:
+        print(f"\n  ERROR from Claude API: {e}\n")
+        sys.exit(1)
 
 
 if __name__ == "__main__":
@@ -5,9 +5,79 @@ Parses markdown analysis and generates beautiful HTML memo
 """
 
 import re
+from dataclasses import dataclass, field
+from functools import lru_cache
 from pathlib import Path
 from datetime import datetime
 
+# Patterns used on every memo - compiled once at import
+# Markdown structure: "### SECTION" headers split the analysis, and "# TITLE",
+# "## ..." and "---" lines (with their leading newline) are not section content
+_RE_SECTION_SPLIT = re.compile(r'(?:^|\n)[^\S\n]*### [^\S\n]*(.*\S)[^\S\n]*(?=\n|\Z)')
+_RE_TITLE_LINE = re.compile(r'\n[^\S\n]*(?:# [^\S\n]*(.*\S)|## .*\S|---)[^\S\n]*(?=\n|\Z)')
+_RE_LINK_ANY = re.compile(r'\[([^\]]*)\]\(([^)]*)\)')
+_RE_INLINE = re.compile(r'\[([^\]]*)\]\(([^)]*)\)|\*\*(.+?)\*\*')
+_RE_BOLD = re.compile(r'\*\*(.+?)\*\*')
+_RE_ESC_BOLD = re.compile(r'\*\*(.+?)\*\*|[&<>"\']')
+_RE_LISTSPLIT = re.compile(r'\n[-*]\s')
+# Line-anchored forms match one stripped line each, so parsers can finditer
+# over a whole section instead of splitting and stripping it first
+_RE_LABEL_VALUE_LINE = re.compile(r'^[^\S\n]*\*\*(.+?):\*\*[^\S\n]*(.*\S)', re.MULTILINE)
+# List items with an optional bold lead-in: "- **Title:** desc" and "1. **Question** views".
+# The lead-in is only taken when text follows it, otherwise the whole item is the text
+_RE_BULLET_ITEM = re.compile(
+    r'^[^\S\n]*[-*] (?:\*\*(.+?)\*\*[^\S\n]*[-:]+[^\S\n]*)?(.*\S)', re.MULTILINE)
+_RE_NUMBERED_ITEM = re.compile(
+    r'^[^\S\n]*\d+\.[^\S\n]*((?:\*\*(.+?)\*\*:?[^\S\n]*)?(.*\S))', re.MULTILINE)
+_RE_TABLE_ROW = re.compile(r'^[^\S\n]*(\|.*\S)', re.MULTILINE)
+_RE_OVERALL_FIT_LINE = re.compile(r'^.*(?:Overall Fit|OVERALL FIT).*$', re.MULTILINE)
+_RE_TEXT_LINE = re.compile(r'^[^\S\n]*(\S(?:.*\S)?)', re.MULTILINE)
+_RE_FIT_OVERALL = re.compile(r'(STRONG|MODERATE|WEAK)', re.IGNORECASE)
+_RE_CONF = re.compile(r'(HIGH|MEDIUM|LOW)', re.IGNORECASE)
+_RE_VERDICT_HEADER = re.compile(r'#\s*(PURSUE|PASS|MONITOR)')
+_RE_CONF_BOLD = re.compile(r'\*\*Confidence:\*\*\s*(HIGH|MEDIUM|LOW)', re.IGNORECASE)
+_RE_NUM_LINE = re.compile(r'^\d+\.')
+_RE_NUM_ITEM = re.compile(r'^\d+\.\s')
+_RE_INFO_GAPS = re.compile(r'Information Gaps:?\s*(.+)', re.IGNORECASE)
+_RE_RISK_BOLD = re.compile(r'^\d+\.\s*\*\*(.+?):\*\*\s*(.+)')
+_RE_RISK_PLAIN = re.compile(r'^\d+\.\s*(.+?):\s*(.+)')
+_TOKEN_RE = re.compile(r'\{\{(\w+)\}\}')
+
+_RATING_CLASS = {r: r.lower() for r in ('Strong', 'Moderate', 'Weak', 'STRONG', 'MODERATE', 'WEAK')}
+_VERDICTS = frozenset(('PURSUE', 'PASS', 'MONITOR'))
+_APPENDIX_START = '<!-- ANALYST_APPENDIX_START -->'
+_APPENDIX_END = '<!-- ANALYST_APPENDIX_END -->'
+
+
+@dataclass(slots=True)
+class LabelValue:
+    """A "**Label:** value" line from the snapshot or proposed terms."""
+    label: str
+    value: str
+
+
+@dataclass(slots=True)
+class FitTable:
+    """The Bramble fit table, stored column-wise (one list per column)."""
+    criterion: list = field(default_factory=list)
+    rating: list = field(default_factory=list)
+    assessment: list = field(default_factory=list)
+    rating_class: list = field(default_factory=list)
+
+
+@dataclass(slots=True)
+class CasePoint:
+    """A bull/bear point or a numbered risk; title may be empty."""
+    title: str
+    description: str
+
+
+@dataclass(slots=True)
+class Debate:
+    """A key debate question and the views on it."""
+    question: str
+    views: str
+
 
 def parse_analysis(analysis: str) -> dict:
     """Parse the markdown analysis into sections."""
@@ -20,7 +90,7 @@ def parse_analysis(analysis: str) -> dict:
         'competition': '',
         'team': '',
         'investors': '',
-        'fit_table': [],
+        'fit_table': FitTable(),
         'overall_fit': '',
         'bull_case': [],
         'bear_case': [],
@@ -35,114 +105,140 @@ def parse_analysis(analysis: str) -> dict:
         'bottom_line': ''
     }
 
-    lines = analysis.split('\n')
-    current_section = None
-    current_content = []
-
-    for line in lines:
-        line_stripped = line.strip()
-
-        # Company name (# COMPANY NAME)
-        if line_stripped.startswith('# ') and not line_stripped.startswith('## '):
-            name = line_stripped[2:].strip()
+    def title_line(match):
+        # Company name (# COMPANY NAME) or a top-level verdict (# PURSUE)
+        name = match.group(1)
+        if name is not None:
             # Remove any bold markdown formatting
-            name_clean = name.replace('**', '').replace('*', '').strip()
-            if name_clean.upper() in ['PURSUE', 'PASS', 'MONITOR']:
+            name_clean = name.replace('*', '').strip()
+            if name_clean.upper() in _VERDICTS:
                 sections['verdict'] = name_clean.upper()
             else:
                 sections['company_name'] = name
-            continue
+        # Drop title lines, other headers and dividers from the section body
+        return ''
 
-        # Section headers (### SECTION)
-        if line_stripped.startswith('### '):
-            # Save previous section
-            if current_section and current_content:
-                save_section(sections, current_section, current_content)
+    # [preamble, header1, body1, header2, body2, ...]; each body is its
+    # lines with a leading newline, or '' when the section has no lines
+    parts = _RE_SECTION_SPLIT.split(analysis)
+    # The preamble has no body to keep; only its title lines matter
+    for match in _RE_TITLE_LINE.finditer('\n' + parts[0]):
+        title_line(match)
 
-            current_section = line_stripped[4:].strip().upper()
-            current_content = []
-            continue
-
-        # Skip other headers and dividers
-        if line_stripped.startswith('## ') or line_stripped == '---':
-            continue
-
-        # Collect content
-        if current_section:
-            current_content.append(line)
-
-    # Save last section
-    if current_section and current_content:
-        save_section(sections, current_section, current_content)
+    for i in range(1, len(parts), 2):
+        body = _RE_TITLE_LINE.sub(title_line, parts[i + 1])
+        if body:
+            save_section(sections, parts[i].upper(), body)
 
     return sections
 
 
-def save_section(sections: dict, section_name: str, content: list):
+# Header keyword -> section kind, checked in order (first substring match wins)
+_SECTION_KEYWORDS = (
+    ('OPPORTUNITY', 'OPPORTUNITY'),
+    ('SNAPSHOT', 'SNAPSHOT'),
+    ('MARKET', 'MARKET'),
+    ('COMPETITIVE', 'COMPETITION'),
+    ('COMPETITION', 'COMPETITION'),
+    ('TEAM', 'TEAM'),
+    ('INVESTOR', 'INVESTORS'),
+    ('FIT', 'FIT'),
+    ('BULL', 'BULL'),
+    ('BEAR', 'BEAR'),
+    ('KEY DEBATE', 'DEBATES'),
+    ('DEBATES', 'DEBATES'),
+    ('RECOMMENDATION', 'RECOMMENDATION'),
+    ('TERMS', 'TERMS'),
+    ('RISK', 'RISKS'),
+    ('DUE DILIGENCE', 'DD'),
+    ('DD', 'DD'),
+    ('BOTTOM', 'BOTTOM_LINE'),
+)
+
+
+@lru_cache(maxsize=64)
+def _section_kind(section_name: str):
+    """Map a ### header to its section kind, or None if it isn't one we render."""
+    for keyword, kind in _SECTION_KEYWORDS:
+        if keyword in section_name:
+            return kind
+    return None
+
+
+def save_section(sections: dict, section_name: str, body: str):
     """Process and save a section's content."""
 
-    text = '\n'.join(content).strip()
-
-    if 'OPPORTUNITY' in section_name:
-        sections['opportunity'] = markdown_to_html(text)
-
-    elif 'SNAPSHOT' in section_name:
-        sections['snapshot'] = parse_snapshot(text)
-
-    elif 'MARKET' in section_name:
-        sections['market'] = markdown_to_html(text)
-
-    elif 'COMPETITIVE' in section_name or 'COMPETITION' in section_name:
-        sections['competition'] = markdown_to_html(text)
-
-    elif 'TEAM' in section_name:
-        sections['team'] = markdown_to_html(text, preserve_breaks=True)
-
-    elif 'INVESTOR' in section_name or 'EXISTING INVESTOR' in section_name:
-        sections['investors'] = markdown_to_html(text)
-
-    elif 'FIT' in section_name:
-        sections['fit_table'], sections['overall_fit'] = parse_fit_table(text)
-
-    elif 'BULL' in section_name:
-        sections['bull_case'] = parse_bullet_points(text)
-
-    elif 'BEAR' in section_name:
-        sections['bear_case'] = parse_bullet_points(text)
-
-    elif 'KEY DEBATE' in section_name or 'DEBATES' in section_name:
-        sections['key_debates'] = parse_debates(text)
-
-    elif 'RECOMMENDATION' in section_name:
-        verdict, confidence, rationale = parse_verdict(text)
-        if verdict:
-            sections['verdict'] = verdict
-        if confidence:
-            sections['confidence'] = confidence
-        sections['verdict_rationale'] = rationale
-
-    elif 'TERMS' in section_name:
-        sections['terms'] = parse_terms(text)
-
-    elif 'RISK' in section_name:
-        sections['risks'], sections['info_gaps'] = parse_risks(text)
-
-    elif 'DUE DILIGENCE' in section_name or 'DD' in section_name:
-        sections['dd_priorities'] = parse_dd(text)
-
-    elif 'BOTTOM' in section_name:
-        sections['bottom_line'] = markdown_to_html(text)
+    kind = _section_kind(section_name)
+    if kind is None:
+        return
+
+    text = body.strip()
+
+    match kind:
+        case 'OPPORTUNITY':
+            sections['opportunity'] = markdown_to_html(text)
+        case 'SNAPSHOT':
+            sections['snapshot'] = parse_snapshot(text)
+        case 'MARKET':
+            sections['market'] = markdown_to_html(text)
+        case 'COMPETITION':
+            sections['competition'] = markdown_to_html(text)
+        case 'TEAM':
+            sections['team'] = markdown_to_html(text, preserve_breaks=True)
+        case 'INVESTORS':
+            sections['investors'] = markdown_to_html(text)
+        case 'FIT':
+            sections['fit_table'], sections['overall_fit'] = parse_fit_table(text)
+        case 'BULL':
+            sections['bull_case'] = parse_bullet_points(text)
+        case 'BEAR':
+            sections['bear_case'] = parse_bullet_points(text)
+        case 'DEBATES':
+            sections['key_debates'] = parse_debates(text)
+        case 'RECOMMENDATION':
+            verdict, confidence, rationale = parse_verdict(text)
+            if verdict:
+                sections['verdict'] = verdict
+            if confidence:
+                sections['confidence'] = confidence
+            sections['verdict_rationale'] = rationale
+        case 'TERMS':
+            sections['terms'] = parse_terms(text)
+        case 'RISKS':
+            sections['risks'], sections['info_gaps'] = parse_risks(text)
+        case 'DD':
+            sections['dd_priorities'] = parse_dd(text)
+        case 'BOTTOM_LINE':
+            sections['bottom_line'] = markdown_to_html(text)
+
+
+def _link_sub(match) -> str:
+    """Render [text](url) as a citation link; [](url) and [text]() are dropped."""
+    text, url = match.group(1), match.group(2)
+    if not text or not url:
+        return ''
+    return f'<a href="{url}" target="_blank" class="citation">{text}</a>'
+
+
+def _inline_sub(match) -> str:
+    """Render a link or a bold run, including bold inside links and links inside bold."""
+    bold = match.group(3)
+    if bold is not None:
+        if '[' in bold:
+            bold = _RE_LINK_ANY.sub(_link_sub, bold)
+        return f'<strong>{bold}</strong>'
+    text, url = match.group(1), match.group(2)
+    if not text or not url:
+        return ''
+    if '**' in text:
+        text = _RE_BOLD.sub(r'<strong>\1</strong>', text)
+    return f'<a href="{url}" target="_blank" class="citation">{text}</a>'
 
 
 def markdown_to_html(text: str, preserve_breaks: bool = False) -> str:
     """Convert markdown to HTML."""
-    # Remove empty citation links [](url) or [text]()
-    text = re.sub(r'\[\]\([^)]*\)', '', text)
-    text = re.sub(r'\[[^\]]+\]\(\)', '', text)
-    # Links [text](url) -> <a href="url" target="_blank">text</a>
-    text = re.sub(r'\[([^\]]+)\]\(([^)]+)\)', r'<a href="\2" target="_blank" class="citation">\1</a>', text)
-    # Bold
-    text = re.sub(r'\*\*(.+?)\*\*', r'<strong>\1</strong>', text)
+    # Links [text](url) -> <a href="url" target="_blank">text</a> and bold, in one pass
+    text = _RE_INLINE.sub(_inline_sub, text)
     # Paragraphs
     paragraphs = text.split('\n\n')
     html_parts = []
@@ -150,14 +246,13 @@ def markdown_to_html(text: str, preserve_breaks: bool = False) -> str:
         p = p.strip()
         if p:
             # Check if it's a list
-            if p.startswith('- ') or p.startswith('* '):
-                items = re.split(r'\n[-*]\s', p)
+            if p.startswith(('- ', '* ')):
+                items = _RE_LISTSPLIT.split(p)
                 items[0] = items[0][2:]  # Remove first bullet
                 html_parts.append('<ul>' + ''.join(f'<li>{item.strip()}</li>' for item in items if item.strip()) + '</ul>')
             elif preserve_breaks:
                 # Keep line breaks (for team section)
-                lines = p.split('\n')
-                html_parts.append('<p>' + '<br>\n'.join(line.strip() for line in lines if line.strip()) + '</p>')
+                html_parts.append('<p>' + '<br>\n'.join(_RE_TEXT_LINE.findall(p)) + '</p>')
             else:
                 html_parts.append(f'<p>{p.replace(chr(10), " ")}</p>')
     return '\n'.join(html_parts)
@@ -166,47 +261,46 @@ def markdown_to_html(text: str, preserve_breaks: bool = False) -> str:
 def parse_snapshot(text: str) -> list:
     """Parse snapshot section into label/value pairs."""
     items = []
-    for line in text.split('\n'):
-        line = line.strip()
-        if line.startswith('**') and ':**' in line:
-            match = re.match(r'\*\*(.+?):\*\*\s*(.+)', line)
-            if match:
-                value = match.group(2)
-                # Convert markdown links to HTML
-                value = re.sub(r'\[([^\]]+)\]\(([^)]+)\)', r'<a href="\2" target="_blank" class="citation">\1</a>', value)
-                items.append({
-                    'label': match.group(1),
-                    'value': value
-                })
+    for match in _RE_LABEL_VALUE_LINE.finditer(text):
+        items.append(LabelValue(
+            label=match.group(1),
+            # Convert markdown links to HTML
+            value=_RE_LINK_ANY.sub(_link_sub, match.group(2))
+        ))
     return items
 
 
+def _rating_class(rating: str) -> str:
+    """CSS class for a rating badge: its first word, lowercased."""
+    if not rating:
+        return ''
+    word = rating.split(None, 1)[0]
+    return _RATING_CLASS.get(word) or word.lower()
+
+
 def parse_fit_table(text: str) -> tuple:
     """Parse fit table and overall fit."""
-    rows = []
+    table = FitTable()
     overall = ''
 
-    lines = text.split('\n')
-    in_table = False
-
-    for line in lines:
-        line = line.strip()
+    for row in _RE_TABLE_ROW.finditer(text):
+        line = row.group(1)
+        if '---' in line:
+            continue
+        cells = [c.strip() for c in line.split('|')[1:-1]]
+        if len(cells) >= 3 and cells[0].lower() not in ('criterion', ''):
+            table.criterion.append(cells[0])
+            table.rating.append(cells[1])
+            table.assessment.append(cells[2])
+            table.rating_class.append(_rating_class(cells[1]))
 
-        if line.startswith('|') and '---' not in line:
-            cells = [c.strip() for c in line.split('|')[1:-1]]
-            if len(cells) >= 3 and cells[0].lower() not in ['criterion', '']:
-                rows.append({
-                    'criterion': cells[0],
-                    'rating': cells[1],
-                    'assessment': cells[2] if len(cells) > 2 else ''
-                })
-
-        if 'Overall Fit' in line or 'OVERALL FIT' in line:
-            match = re.search(r'(STRONG|MODERATE|WEAK)', line, re.IGNORECASE)
-            if match:
-                overall = match.group(1).upper()
+    # The last "Overall Fit" line with a rating wins
+    for line in _RE_OVERALL_FIT_LINE.findall(text):
+        match = _RE_FIT_OVERALL.search(line)
+        if match:
+            overall = match.group(1).upper()
 
-    return rows, overall
+    return table, overall
 
 
 def parse_verdict(text: str) -> tuple:
@@ -215,28 +309,26 @@ def parse_verdict(text: str) -> tuple:
     confidence = ''
     rationale = ''
 
-    lines = text.split('\n')
-    for i, line in enumerate(lines):
+    for line in text.split('\n'):
         line = line.strip()
-        if line in ['# PURSUE', '# PASS', '# MONITOR']:
+        if line.startswith('# ') and line[2:] in _VERDICTS:
             verdict = line[2:]
-        elif line in ['PURSUE', 'PASS', 'MONITOR']:
+        elif line in _VERDICTS:
             verdict = line
         elif '**Confidence:**' in line or 'Confidence:' in line:
-            match = re.search(r'(HIGH|MEDIUM|LOW)', line, re.IGNORECASE)
+            match = _RE_CONF.search(line)
             if match:
                 confidence = match.group(1).upper()
         elif line and not line.startswith('#') and not line.startswith('*') and 'Confidence' not in line:
             # This is the rationale
-            rationale = re.sub(r'\*\*(.+?)\*\*', r'<strong>\1</strong>', line)
+            rationale = _RE_BOLD.sub(r'<strong>\1</strong>', line)
             break
 
     # Get remaining text as rationale if not found
     if not rationale:
-        remaining = '\n'.join(lines).strip()
-        remaining = re.sub(r'#\s*(PURSUE|PASS|MONITOR)', '', remaining)
-        remaining = re.sub(r'\*\*Confidence:\*\*\s*(HIGH|MEDIUM|LOW)', '', remaining, flags=re.IGNORECASE)
-        remaining = re.sub(r'\*\*(.+?)\*\*', r'<strong>\1</strong>', remaining)
+        remaining = _RE_VERDICT_HEADER.sub('', text)
+        remaining = _RE_CONF_BOLD.sub('', remaining)
+        remaining = _RE_BOLD.sub(r'<strong>\1</strong>', remaining)
         rationale = remaining.strip()
 
     return verdict, confidence, rationale
@@ -244,50 +336,25 @@ def parse_verdict(text: str) -> tuple:
 
 def parse_bullet_points(text: str) -> list:
     """Parse bullet points with bold headers (for bull/bear cases)."""
-    points = []
-
-    for line in text.split('\n'):
-        line = line.strip()
-        if line.startswith('- ') or line.startswith('* '):
-            line = line[2:]
-            # Extract bold header and description - handle "**Title** - desc" or "**Title:** desc" or "**Title::** desc"
-            match = re.match(r'\*\*(.+?)\*\*\s*[-:]+\s*(.+)', line)
-            if match:
-                title = match.group(1).rstrip(':')  # Remove any trailing colons from title
-                points.append({
-                    'title': title,
-                    'description': match.group(2)
-                })
-            elif line:
-                points.append({
-                    'title': '',
-                    'description': line
-                })
-
-    return points
+    # Handles "**Title** - desc", "**Title:** desc" and "**Title::** desc"; trailing
+    # colons are removed from the title
+    return [
+        CasePoint(title=title.rstrip(':'), description=description)
+        for title, description in _RE_BULLET_ITEM.findall(text)
+    ]
 
 
 def parse_debates(text: str) -> list:
     """Parse key debates section."""
     debates = []
 
-    for line in text.split('\n'):
-        line = line.strip()
-        if re.match(r'^\d+\.', line):
-            # Remove the number prefix
-            line = re.sub(r'^\d+\.\s*', '', line)
-            # Extract bold question and views
-            match = re.match(r'\*\*(.+?)\*\*:?\s*(.+)', line)
-            if match:
-                debates.append({
-                    'question': match.group(1),
-                    'views': match.group(2)
-                })
-            elif line:
-                debates.append({
-                    'question': line,
-                    'views': ''
-                })
+    for item in _RE_NUMBERED_ITEM.finditer(text):
+        line, question, views = item.groups()
+        # Bold question and views, or just a question
+        if question is not None:
+            debates.append(Debate(question=question, views=views))
+        else:
+            debates.append(Debate(question=line, views=''))
 
     return debates
 
@@ -295,27 +362,22 @@ def parse_debates(text: str) -> list:
 def parse_terms(text: str) -> list:
     """Parse proposed terms."""
     terms = []
-    for line in text.split('\n'):
-        line = line.strip()
-        if line.startswith('**') and ':**' in line:
-            match = re.match(r'\*\*(.+?):\*\*\s*(.+)', line)
-            if match:
-                terms.append({
-                    'label': match.group(1),
-                    'value': match.group(2)
-                })
+    for match in _RE_LABEL_VALUE_LINE.finditer(text):
+        terms.append(LabelValue(
+            label=match.group(1),
+            value=match.group(2)
+        ))
     return terms
 
 
 def parse_risks(text: str) -> tuple:
     """Parse risks and info gaps."""
     risks = []
-    info_gaps = ''
+    info_gaps = []  # first line, then any continuation lines
 
-    lines = text.split('\n')
     in_risks = False
 
-    for line in lines:
+    for line in text.split('\n'):
         line = line.strip()
 
         if 'Critical Risks' in line or 'Key Risks' in line:
@@ -324,54 +386,55 @@ def parse_risks(text: str) -> tuple:
 
         if 'Information Gaps' in line:
             in_risks = False
-            match = re.search(r'Information Gaps:?\s*(.+)', line, re.IGNORECASE)
+            match = _RE_INFO_GAPS.search(line)
             if match:
-                info_gaps = match.group(1)
+                info_gaps = [match.group(1)]
             continue
 
-        if in_risks and re.match(r'^\d+\.', line):
+        if in_risks and _RE_NUM_LINE.match(line):
             # Numbered risk
-            match = re.match(r'^\d+\.\s*\*\*(.+?):\*\*\s*(.+)', line)
+            match = _RE_RISK_BOLD.match(line)
             if match:
-                risks.append({
-                    'title': match.group(1),
-                    'description': match.group(2)
-                })
+                risks.append(CasePoint(
+                    title=match.group(1),
+                    description=match.group(2)
+                ))
             else:
                 # No bold formatting
-                match = re.match(r'^\d+\.\s*(.+?):\s*(.+)', line)
+                match = _RE_RISK_PLAIN.match(line)
                 if match:
-                    risks.append({
-                        'title': match.group(1),
-                        'description': match.group(2)
-                    })
+                    risks.append(CasePoint(
+                        title=match.group(1),
+                        description=match.group(2)
+                    ))
 
         if not in_risks and line and 'Information' not in line:
             # Might be info gaps continuation
             if info_gaps:
-                info_gaps += ' ' + line
+                info_gaps.append(line)
 
-    return risks, info_gaps
+    return risks, ' '.join(info_gaps)
 
 
 def parse_dd(text: str) -> list:
     """Parse due diligence priorities."""
-    priorities = []
+    return [item.group(1) for item in _RE_NUMBERED_ITEM.finditer(text)]
 
-    for line in text.split('\n'):
-        line = line.strip()
-        if re.match(r'^\d+\.', line):
-            item = re.sub(r'^\d+\.\s*', '', line)
-            if item:
-                priorities.append(item)
 
-    return priorities
+# Same characters html.escape(quote=True) handles, in one C-level scan
+_HTML_ESCAPE_TABLE = str.maketrans({'&': '&amp;', '<': '&lt;', '>': '&gt;', '"': '&quot;', "'": '&#x27;'})
+
+
+def _esc_bold(match) -> str:
+    """Escape one special character, or render **text** with its text escaped."""
+    bold = match.group(1)
+    if bold is None:
+        return _HTML_ESCAPE_TABLE[ord(match.group(0))]
+    return f'<strong>{bold.translate(_HTML_ESCAPE_TABLE)}</strong>'
 
 
 def markdown_to_simple_html(text: str) -> str:
     """Convert markdown to simple HTML for analyst sections."""
-    import html as html_lib
-
     lines = text.strip().split('\n')
     result = []
     current_list = []
@@ -388,11 +451,8 @@ def markdown_to_simple_html(text: str) -> str:
                 in_list = False
             continue
 
-        # Escape HTML
-        line_escaped = html_lib.escape(line_stripped)
-
-        # Bold
-        line_escaped = re.sub(r'\*\*(.+?)\*\*', r'<strong>\1</strong>', line_escaped)
+        # Escape HTML and render bold in one pass
+        line_escaped = _RE_ESC_BOLD.sub(_esc_bold, line_stripped)
 
         # Headers
         if line_stripped.startswith('### '):
@@ -414,13 +474,14 @@ def markdown_to_simple_html(text: str) -> str:
                 in_list = False
             result.append(f'<h3>{line_escaped[2:]}</h3>')
         # Bullet points
-        elif line_stripped.startswith('- ') or line_stripped.startswith('* '):
+        elif line_stripped.startswith(('- ', '* ')):
             in_list = True
             current_list.append(f'<li>{line_escaped[2:]}</li>')
         # Numbered lists
-        elif re.match(r'^\d+\.\s', line_stripped):
+        elif number := _RE_NUM_ITEM.match(line_stripped):
             in_list = True
-            content = re.sub(r'^\d+\.\s*', '', line_escaped)
+            # Escaping leaves the "1. " prefix alone, so slice it off directly
+            content = line_escaped[number.end():].lstrip()
             current_list.append(f'<li>{content}</li>')
         # Regular paragraph
         else:
@@ -437,179 +498,202 @@ def markdown_to_simple_html(text: str) -> str:
     return '\n'.join(result)
 
 
+_FIT_TABLE_HEAD = ('<table class="fit-table"><thead><tr><th>Criterion</th><th>Rating</th>'
+                   '<th>Assessment</th></tr></thead><tbody>')
+_TERMS_HEAD = '''
+        <div class="section">
+            <h2 class="section-title">Proposed Terms</h2>
+            <div class="terms-grid">'''
+
+
+def _case_item(point: CasePoint) -> str:
+    if point.title:
+        return f'<li><span class="case-title">{point.title}:</span> {point.description}</li>'
+    return f'<li>{point.description}</li>'
+
+
+def _debate_item(debate: Debate) -> str:
+    if debate.views:
+        return (f'<li><span class="debate-question">{debate.question}</span>'
+                f'<span class="debate-views">{debate.views}</span></li>')
+    return f'<li><span class="debate-question">{debate.question}</span></li>'
+
+
+def _term_item(term: LabelValue, ticket_rationale: str) -> str:
+    # Add rationale under ticket size
+    if 'ticket size' in term.label.lower() and ticket_rationale:
+        return f'''
+                <div class="term-item">
+                    <div class="term-label">{term.label}</div>
+                    <div class="term-value">{term.value}</div>
+                    <div class="term-rationale">{ticket_rationale}</div>
+                </div>'''
+    return f'''
+                <div class="term-item">
+                    <div class="term-label">{term.label}</div>
+                    <div class="term-value">{term.value}</div>
+                </div>'''
+
+
+@lru_cache(maxsize=1)
+def _load_template() -> str:
+    """Read memo_template.html once per process."""
+    return (Path(__file__).parent / 'memo_template.html').read_text(encoding='utf-8')
+
+
 def generate_html(sections: dict, source: str = '', date_str: str = '',
                   bull_case: str = '', bear_case: str = '', deliberation: str = '') -> str:
     """Generate HTML from sections using template."""
 
-    template_path = Path(__file__).parent / 'memo_template.html'
-    with open(template_path, 'r') as f:
-        html = f.read()
+    html = _load_template()
+
+    # Token values, filled into the template in one pass at the end
+    values = {}
 
     # Basic replacements
-    html = html.replace('{{COMPANY_NAME}}', sections['company_name'])
-    html = html.replace('{{DATE}}', date_str or datetime.now().strftime('%d %B %Y'))
-    html = html.replace('{{SOURCE}}', source)
-    html = html.replace('{{OPPORTUNITY}}', sections['opportunity'])
-    html = html.replace('{{MARKET}}', sections['market'])
-    html = html.replace('{{COMPETITION}}', sections['competition'])
-    html = html.replace('{{TEAM}}', sections['team'])
+    values['COMPANY_NAME'] = sections['company_name']
+    values['DATE'] = date_str or datetime.now().strftime('%d %B %Y')
+    values['SOURCE'] = source
+    values['OPPORTUNITY'] = sections['opportunity']
+    values['MARKET'] = sections['market']
+    values['COMPETITION'] = sections['competition']
+    values['TEAM'] = sections['team']
 
     # Investors
     investors_content = sections.get('investors', '')
-    html = html.replace('{{INVESTORS}}', investors_content if investors_content else '<p>No prior investor information found.</p>')
+    values['INVESTORS'] = investors_content if investors_content else '<p>No prior investor information found.</p>'
 
     # Snapshot
-    snapshot_html = ''
-    for item in sections['snapshot']:
-        snapshot_html += f'''
+    values['SNAPSHOT'] = ''.join(f'''
         <div class="snapshot-row">
-            <span class="snapshot-label">{item['label']}</span>
-            <span class="snapshot-value">{item['value']}</span>
-        </div>'''
-    html = html.replace('{{SNAPSHOT}}', snapshot_html)
+            <span class="snapshot-label">{item.label}</span>
+            <span class="snapshot-value">{item.value}</span>
+        </div>''' for item in sections['snapshot'])
 
     # Fit table
-    fit_html = '<table class="fit-table"><thead><tr><th>Criterion</th><th>Rating</th><th>Assessment</th></tr></thead><tbody>'
-    for row in sections['fit_table']:
-        rating_class = row['rating'].lower().split()[0] if row['rating'] else ''
-        fit_html += f'''
+    fit = sections['fit_table']
+    fit_rows = ''.join(f'''
         <tr>
-            <td class="criterion">{row['criterion']}</td>
-            <td class="rating"><span class="rating-badge {rating_class}">{row['rating']}</span></td>
-            <td>{row['assessment']}</td>
-        </tr>'''
-    fit_html += '</tbody></table>'
+            <td class="criterion">{criterion}</td>
+            <td class="rating"><span class="rating-badge {rating_class}">{rating}</span></td>
+            <td>{assessment}</td>
+        </tr>''' for criterion, rating, assessment, rating_class
+        in zip(fit.criterion, fit.rating, fit.assessment, fit.rating_class))
+    fit_html = f'{_FIT_TABLE_HEAD}{fit_rows}</tbody></table>'
     if sections['overall_fit']:
         fit_html += f'<div class="overall-fit"><strong>Overall Fit: {sections["overall_fit"]}</strong></div>'
-    html = html.replace('{{FIT_TABLE}}', fit_html)
+    values['FIT_TABLE'] = fit_html
 
     # Bull/Bear cases
-    bull_html = '<ul class="case-list bull">'
-    for point in sections['bull_case']:
-        if point['title']:
-            bull_html += f'<li><span class="case-title">{point["title"]}:</span> {point["description"]}</li>'
-        else:
-            bull_html += f'<li>{point["description"]}</li>'
-    bull_html += '</ul>'
-    html = html.replace('{{BULL_CASE}}', bull_html if sections['bull_case'] else '<p>Not provided</p>')
-
-    bear_html = '<ul class="case-list bear">'
-    for point in sections['bear_case']:
-        if point['title']:
-            bear_html += f'<li><span class="case-title">{point["title"]}:</span> {point["description"]}</li>'
-        else:
-            bear_html += f'<li>{point["description"]}</li>'
-    bear_html += '</ul>'
-    html = html.replace('{{BEAR_CASE}}', bear_html if sections['bear_case'] else '<p>Not provided</p>')
+    if sections['bull_case']:
+        bull_items = ''.join(map(_case_item, sections['bull_case']))
+        values['BULL_CASE'] = f'<ul class="case-list bull">{bull_items}</ul>'
+    else:
+        values['BULL_CASE'] = '<p>Not provided</p>'
+
+    if sections['bear_case']:
+        bear_items = ''.join(map(_case_item, sections['bear_case']))
+        values['BEAR_CASE'] = f'<ul class="case-list bear">{bear_items}</ul>'
+    else:
+        values['BEAR_CASE'] = '<p>Not provided</p>'
 
     # Key debates
-    debates_html = '<ul class="debates-list">'
-    for debate in sections['key_debates']:
-        debates_html += f'<li><span class="debate-question">{debate["question"]}</span>'
-        if debate['views']:
-            debates_html += f'<span class="debate-views">{debate["views"]}</span>'
-        debates_html += '</li>'
-    debates_html += '</ul>'
-    html = html.replace('{{KEY_DEBATES}}', debates_html if sections['key_debates'] else '<p>Not provided</p>')
+    if sections['key_debates']:
+        debate_items = ''.join(map(_debate_item, sections['key_debates']))
+        values['KEY_DEBATES'] = f'<ul class="debates-list">{debate_items}</ul>'
+    else:
+        values['KEY_DEBATES'] = '<p>Not provided</p>'
 
     # Verdict
     verdict = sections['verdict']
     confidence = sections.get('confidence', '')
-    html = html.replace('{{VERDICT}}', verdict)
-    html = html.replace('{{VERDICT_CLASS}}', verdict.lower())
-    html = html.replace('{{CONFIDENCE}}', confidence)
-    html = html.replace('{{CONFIDENCE_CLASS}}', confidence.lower() if confidence else '')
-    html = html.replace('{{VERDICT_RATIONALE}}', sections['verdict_rationale'])
+    values['VERDICT'] = verdict
+    values['VERDICT_CLASS'] = verdict.lower()
+    values['CONFIDENCE'] = confidence
+    values['CONFIDENCE_CLASS'] = confidence.lower() if confidence else ''
+    values['VERDICT_RATIONALE'] = sections['verdict_rationale']
 
     # Terms (only if PURSUE)
     if verdict == 'PURSUE' and sections['terms']:
-        terms_html = '''
-        <div class="section">
-            <h2 class="section-title">Proposed Terms</h2>
-            <div class="terms-grid">'''
-
         # Find ticket rationale to pair with ticket size
-        ticket_rationale = ''
-        for term in sections['terms']:
-            if 'rationale' in term['label'].lower():
-                ticket_rationale = term['value']
-                break
-
-        for term in sections['terms']:
-            # Skip rationale - it gets merged with ticket size
-            if 'rationale' in term['label'].lower():
-                continue
-
-            # Add rationale under ticket size
-            if 'ticket size' in term['label'].lower() and ticket_rationale:
-                terms_html += f'''
-                <div class="term-item">
-                    <div class="term-label">{term['label']}</div>
-                    <div class="term-value">{term['value']}</div>
-                    <div class="term-rationale">{ticket_rationale}</div>
-                </div>'''
-            else:
-                terms_html += f'''
-                <div class="term-item">
-                    <div class="term-label">{term['label']}</div>
-                    <div class="term-value">{term['value']}</div>
-                </div>'''
-        terms_html += '</div></div>'
-        html = html.replace('{{TERMS_SECTION}}', terms_html)
+        ticket_rationale = next(
+            (term.value for term in sections['terms'] if 'rationale' in term.label.lower()), '')
+
+        # Skip rationale - it gets merged with ticket size
+        term_items = ''.join(
+            _term_item(term, ticket_rationale) for term in sections['terms']
+            if 'rationale' not in term.label.lower()
+        )
+        values['TERMS_SECTION'] = f'{_TERMS_HEAD}{term_items}</div></div>'
     else:
-        html = html.replace('{{TERMS_SECTION}}', '')
+        values['TERMS_SECTION'] = ''
 
     # Risks
-    risks_html = '<ul class="risk-list">'
-    for risk in sections['risks']:
-        risks_html += f'''
+    risk_items = ''.join(f'''
         <li>
-            <span class="risk-title">{risk['title']}:</span> {risk['description']}
-        </li>'''
-    risks_html += '</ul>'
+            <span class="risk-title">{risk.title}:</span> {risk.description}
+        </li>''' for risk in sections['risks'])
+    risks_html = f'<ul class="risk-list">{risk_items}</ul>'
     if sections['info_gaps']:
         risks_html += f'''
         <div class="info-gaps">
             <div class="info-gaps-title">Information Gaps</div>
             {sections['info_gaps']}
         </div>'''
-    html = html.replace('{{RISKS}}', risks_html)
+    values['RISKS'] = risks_html
 
     # DD Priorities
-    dd_html = '<ul class="dd-list">'
-    for priority in sections['dd_priorities']:
-        dd_html += f'<li>{priority}</li>'
-    dd_html += '</ul>'
-    html = html.replace('{{DD_PRIORITIES}}', dd_html)
+    dd_items = ''.join(f'<li>{priority}</li>' for priority in sections['dd_priorities'])
+    values['DD_PRIORITIES'] = f'<ul class="dd-list">{dd_items}</ul>'
 
     # Bottom line
-    html = html.replace('{{BOTTOM_LINE}}', sections['bottom_line'].replace('<p>', '').replace('</p>', ''))
+    values['BOTTOM_LINE'] = sections['bottom_line'].replace('<p>', '').replace('</p>', '')
 
     # Analyst arguments (collapsible sections)
     if bull_case and bear_case:
         bull_html = markdown_to_simple_html(bull_case)
         bear_html = markdown_to_simple_html(bear_case)
         deliberation_html = markdown_to_simple_html(deliberation) if deliberation else ''
-        html = html.replace('{{BULL_ANALYST}}', bull_html)
-        html = html.replace('{{BEAR_ANALYST}}', bear_html)
-        html = html.replace('{{DELIBERATION}}', deliberation_html)
-        html = html.replace('{{ANALYST_SECTIONS}}', '')  # Show the section
+        values['BULL_ANALYST'] = bull_html
+        values['BEAR_ANALYST'] = bear_html
+        values['DELIBERATION'] = deliberation_html
+        values['ANALYST_SECTIONS'] = ''  # Show the section
     else:
         # Hide the entire analyst appendix if no data
-        html = re.sub(r'<!-- ANALYST_APPENDIX_START -->.*?<!-- ANALYST_APPENDIX_END -->', '', html, flags=re.DOTALL)
+        start = html.find(_APPENDIX_START)
+        end = html.find(_APPENDIX_END, start)
+        if start != -1 and end != -1:
+            html = html[:start] + html[end + len(_APPENDIX_END):]
+
+    return _TOKEN_RE.sub(lambda m: values.get(m.group(1), m.group(0)), html)
 
-    return html
+
+@lru_cache(maxsize=64)
+def _render_memo(analysis: str, source: str, date_str: str,
+                 bull_case: str, bear_case: str, deliberation: str) -> str:
+    """Parse and render a memo; identical inputs reuse the previous HTML."""
+    sections = parse_analysis(analysis)
+    return generate_html(sections, source, date_str, bull_case, bear_case, deliberation)
+
+
+def render_memo(analysis: str, source: str = '', date_str: str = '',
+                bull_case: str = '', bear_case: str = '', deliberation: str = '') -> str:
+    """Parse analysis and return the HTML memo without writing it anywhere."""
+
+    # Resolve the default date here so a cached render never carries a stale one
+    date_str = date_str or datetime.now().strftime('%d %B %Y')
+    return _render_memo(analysis, source, date_str, bull_case, bear_case, deliberation)
 
 
 def create_memo(analysis: str, output_path: str, source: str = '', date_str: str = '',
                 bull_case: str = '', bear_case: str = '', deliberation: str = ''):
     """Parse analysis and create HTML memo."""
 
-    sections = parse_analysis(analysis)
-    html = generate_html(sections, source, date_str, bull_case, bear_case, deliberation)
+    html = render_memo(analysis, source, date_str, bull_case, bear_case, deliberation)
 
-    with open(output_path, 'w') as f:
-        f.write(html)
+    # Binary write: no newline translation or text-layer buffering
+    with open(output_path, 'wb') as f:
+        f.write(html.encode('utf-8'))
 
     return output_path
 
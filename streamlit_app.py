@@ -4,34 +4,31 @@ Bramble Partners - Investment Screening (Streamlit)
 """
 
 import streamlit as st
+import hashlib
+import hmac
 import os
-import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from pathlib import Path
 from datetime import datetime
 
-# Load secrets from .secrets.toml for local dev, or from Streamlit Cloud secrets
+# Load secrets from .secrets.toml for local dev, or from Streamlit Cloud secrets.
+# Cached as a resource so the file is parsed once per process, not on every rerun
+# (a module-level flag would be reset, since each rerun re-executes this script)
+@st.cache_resource(show_spinner=False)
 def load_secrets():
     secrets_file = Path(__file__).parent / ".secrets.toml"
     if secrets_file.exists():
-        import toml
-        secrets = toml.load(secrets_file)
+        import tomllib
+        with open(secrets_file, 'rb') as f:
+            secrets = tomllib.load(f)
         for key, value in secrets.items():
             if key not in os.environ:
                 os.environ[key] = str(value)
 
 load_secrets()
 
-# Import existing screening functions (after loading secrets)
-from bramble_screen import (
-    extract_pdf_text,
-    extract_company_info,
-    research_companies_house,
-    research_investors,
-    research_with_perplexity,
-    analyze_company
-)
-from html_generator import create_memo
-import anthropic
+import orjson
 
 # ============ CONFIG ============
 APP_PASSWORD = os.environ.get("BRAMBLE_PASSWORD", "bramble2026")
@@ -39,6 +36,56 @@ BASE_DIR = Path(__file__).parent
 OUTPUT_FOLDER = BASE_DIR / 'memos'
 OUTPUT_FOLDER.mkdir(exist_ok=True)
 
+# ============ API CLIENTS ============
+@st.cache_resource
+def get_anthropic_client():
+    """One client per server process, so its connection pool stays warm across runs."""
+    import anthropic
+    return anthropic.Anthropic()
+
+
+# ============ HELPERS ============
+def stream_to(placeholder, interval: float = 0.25):
+    """on_text callback that shows streamed text in placeholder as it arrives.
+
+    Redraws at most every interval seconds rather than per token, since each
+    redraw resends the whole text so far to the browser.
+    """
+    chunks = []
+    last_drawn = 0.0
+
+    def on_text(text):
+        nonlocal last_drawn
+        chunks.append(text)
+        now = time.monotonic()
+        if now - last_drawn >= interval:
+            placeholder.markdown(''.join(chunks))
+            last_drawn = now
+
+    return on_text
+
+
+# ============ MEMO LISTING ============
+# The listing is one uncached scandir per rerun, so every stat is fresh; file
+# reads are cached on (path, mtime_ns, size), which an overwrite always changes
+def list_recent_memos(limit: int = 10) -> list:
+    """(mtime_ns, size, name, path) of the newest memos, newest first."""
+    memos = []
+    with os.scandir(OUTPUT_FOLDER) as entries:
+        for entry in entries:
+            if entry.name.endswith('.html'):
+                stat = entry.stat()
+                memos.append((stat.st_mtime_ns, stat.st_size, entry.name, entry.path))
+    memos.sort(reverse=True)
+    return memos[:limit]
+
+
+@st.cache_data(max_entries=32, show_spinner=False)
+def read_memo(path: str, mtime_ns: int, size: int) -> bytes:
+    # Raw bytes: download_button sends them as-is, with no decode/re-encode
+    return Path(path).read_bytes()
+
+
 # ============ PAGE CONFIG ============
 st.set_page_config(
     page_title="Bramble Partners - Investment Screener",
@@ -47,7 +94,13 @@ st.set_page_config(
 )
 
 # ============ CUSTOM CSS ============
-st.markdown("""
+# Behind a cached helper so anything computed into it later is still built once.
+# Not a <link> to ./static: the Streamlit versions requirements.txt allows serve
+# .css from ./static as text/plain with nosniff, so browsers won't apply it as a
+# stylesheet
+@st.cache_data(show_spinner=False)
+def app_css() -> str:
+    return """
 <style>
     .stApp { background-color: #f7f6f3; }
     h1 { color: #2d3b1f !important; text-align: center; }
@@ -62,25 +115,43 @@ st.markdown("""
         color: white;
     }
 </style>
-""", unsafe_allow_html=True)
+"""
+
+
+st.markdown(app_css(), unsafe_allow_html=True)
 
 
 # ============ AUTH ============
+@st.cache_resource(show_spinner=False)
+def password_digest(password: str) -> bytes:
+    return hashlib.sha256(password.encode()).digest()
+
+
 def check_password():
     if "authenticated" not in st.session_state:
         st.session_state.authenticated = False
 
-    if not st.session_state.authenticated:
+    if st.session_state.authenticated:
+        return
+
+    # Drawn in a placeholder so a successful login can clear it and carry on
+    # into the app in this same run, rather than replaying the script
+    login = st.empty()
+    with login.container():
         st.markdown("# Bramble Partners")
         st.markdown('<p class="subtitle">Investment Screener</p>', unsafe_allow_html=True)
         password = st.text_input("Enter password", type="password")
         if st.button("Login"):
-            if password == APP_PASSWORD:
+            # Constant-time comparison of fixed-length digests
+            if hmac.compare_digest(hashlib.sha256(password.encode()).digest(),
+                                   password_digest(APP_PASSWORD)):
                 st.session_state.authenticated = True
-                st.rerun()
             else:
                 st.error("Incorrect password")
+
+    if not st.session_state.authenticated:
         st.stop()
+    login.empty()
 
 check_password()
 
@@ -94,56 +165,76 @@ notes = st.text_area("Additional notes (optional)", placeholder="Meeting notes,
 
 if uploaded_file is not None:
     if st.button("Run Investment Screen", type="primary"):
-        with tempfile.NamedTemporaryFile(delete=False, suffix='.pdf') as tmp_file:
-            tmp_file.write(uploaded_file.getvalue())
-            tmp_path = tmp_file.name
+        # Imported here rather than at the top (after loading secrets): bramble_screen
+        # pulls in anthropic, openai and the PDF libraries, which the login page and
+        # ordinary widget reruns never use
+        from bramble_screen import (
+            CACHE_DIR,
+            UNKNOWN_COMPANY,
+            cached_file,
+            extract_pdf_text,
+            extract_company_info,
+            research_companies_house,
+            research_with_perplexity,
+            analyze_company
+        )
+        from html_generator import render_memo
+
+        # The upload is already in memory; PDFium and pdfplumber read it from there
+        deck_bytes = uploaded_file.getvalue()
+        deck_key = hashlib.sha256(deck_bytes).hexdigest()
+
+        # One status container for the whole screen: each step only updates
+        # its label and appends a line, instead of redrawing page-level widgets
+        screen = st.status("Extracting text from PDF...", expanded=True)
 
         try:
-            progress = st.progress(0, text="Starting...")
-            status = st.empty()
-
-            status.info("Extracting text from PDF...")
-            progress.progress(10)
-            deck_content = extract_pdf_text(tmp_path)
+            # Deck text and company info are keyed by the upload's hash, so a
+            # re-uploaded deck skips PDF parsing and the company-info call
+            deck_content = cached_file(CACHE_DIR / 'pdf_text' / f'{deck_key}.txt',
+                                       lambda: extract_pdf_text(deck_bytes))
 
             if not deck_content.strip():
-                st.error("Could not extract text from PDF.")
+                screen.update(label="No text found in PDF", state="error")
+                st.error("Could not extract text from PDF. It might be image-based (scanned) - "
+                         "try a PDF with selectable text.")
                 st.stop()
 
-            status.info("Identifying company...")
-            progress.progress(20)
-            client = anthropic.Anthropic()
-            company_info = extract_company_info(client, deck_content)
+            screen.update(label="Identifying company...")
+            client = get_anthropic_client()
+            company_info = cached_file(CACHE_DIR / 'company_info' / f'{deck_key}.json',
+                                       lambda: extract_company_info(client, deck_content),
+                                       dump=orjson.dumps, load=orjson.loads,
+                                       # Don't pin a failed extraction to this deck
+                                       keep=lambda info: info.get('company_name') != UNKNOWN_COMPANY)
             company_name = company_info.get('company_name', 'Unknown')
-            st.success(f"Found: **{company_name}**")
-
-            status.info("Checking Companies House...")
-            progress.progress(35)
-            ch_research = research_companies_house(company_name)
-
-            status.info("Researching investors...")
-            progress.progress(50)
-            investor_research = research_investors(company_name, company_info.get('industry', 'technology'))
-
-            status.info("Deep research...")
-            progress.progress(65)
-            perplexity_research = research_with_perplexity(company_info)
+            screen.success(f"Found: **{company_name}**")
+
+            # Independent lookups - run side by side, UI updates stay on this thread
+            screen.update(label="Researching in parallel (Companies House, company, investors & funding)...")
+            with ThreadPoolExecutor(max_workers=2) as executor:
+                futures = {
+                    executor.submit(research_companies_house, company_name): "Companies House",
+                    executor.submit(research_with_perplexity, company_info): "Deep research",
+                }
+                for future in as_completed(futures):
+                    screen.write(f"{futures[future]} complete")
+            ch_research, perplexity_research = (future.result() for future in futures)
 
             research_text = f"""=== COMPANIES HOUSE ===
 {ch_research}
 
-=== INVESTOR RESEARCH ===
-{investor_research}
-
-=== GENERAL RESEARCH ===
+=== COMPANY, INVESTOR & FUNDING RESEARCH ===
 {perplexity_research}"""
 
-            status.info("Running Bull vs Bear analysis...")
-            progress.progress(80)
-            analysis = analyze_company(deck_content, research_text, notes)
+            screen.update(label="Running Bull vs Bear analysis...")
+            screen.write("Bull and Bear analysts arguing their cases, then the IC Chair decides")
+            chair_box = screen.empty()
+            analysis = analyze_company(deck_content, research_text, notes, client=client,
+                                       on_text=stream_to(chair_box))
+            chair_box.empty()
 
-            status.info("Generating memo...")
-            progress.progress(95)
+            screen.update(label="Generating memo...")
 
             memo_text = analysis['memo']
             bull_case = analysis['bull_case']
@@ -156,24 +247,21 @@ if uploaded_file is not None:
             output_filename = f"MEMO_{safe_name}_{date_str}.html"
             output_path = OUTPUT_FOLDER / output_filename
 
-            create_memo(
+            memo_html = render_memo(
                 analysis=memo_text,
-                output_path=str(output_path),
                 source=uploaded_file.name,
                 date_str=date_display,
                 bull_case=bull_case,
                 bear_case=bear_case,
                 deliberation=deliberation
             )
+            # Written before the Recent Memos listing below runs, so it shows up there
+            output_path.write_bytes(memo_html.encode('utf-8'))
 
-            progress.progress(100)
-            status.empty()
+            screen.update(label="Memo generated", state="complete", expanded=False)
 
             st.success(f"Memo generated for **{company_name}**")
 
-            with open(output_path, 'r') as f:
-                memo_html = f.read()
-
             st.download_button(
                 label="Download Memo (HTML)",
                 data=memo_html,
@@ -185,25 +273,21 @@ if uploaded_file is not None:
             st.components.v1.html(memo_html, height=800, scrolling=True)
 
         except Exception as e:
+            screen.update(state="error")
             st.error(f"Error: {str(e)}")
 
-        finally:
-            if os.path.exists(tmp_path):
-                os.unlink(tmp_path)
-
 # Recent memos
 st.markdown("---")
 st.markdown("### Recent Memos")
-memos = sorted(OUTPUT_FOLDER.glob('*.html'), key=lambda x: x.stat().st_mtime, reverse=True)[:10]
+memos = list_recent_memos()
 
 if memos:
-    for memo in memos:
+    for memo_mtime_ns, memo_size, memo_name, memo_path in memos:
         col1, col2 = st.columns([4, 1])
         with col1:
-            st.markdown(f"**{memo.stem}**")
+            st.markdown(f"**{memo_name.removesuffix('.html')}**")
         with col2:
-            with open(memo, 'r') as f:
-                st.download_button("Download", f.read(), memo.name, "text/html", key=memo.name)
+            st.download_button("Download", read_memo(memo_path, memo_mtime_ns, memo_size), memo_name, "text/html", key=memo_name)
 else:
     st.markdown("*No memos yet.*")
 